@@ -0,0 +1,57 @@
+"""
+benchmarks/batch_canny.py
+=========================
+
+Description:
+------------
+Measures how BatchRunner scales on the canny path, from 1 worker up to the number of CPUs (at most 32).
+Run from the repository root: python -m benchmarks.batch_canny
+"""
+
+import os
+import time
+import numpy as np
+import src.ImProUtils.batch as batch
+import src.ImProUtils.edge_detector as edge_detector
+
+SHAPE = (120, 160)
+IMAGES_PER_WORKER = 4
+MAX_WORKERS = 32
+LOW_THRESHOLD, HIGH_THRESHOLD, KERNEL_SIZE = 20, 60, 5
+
+
+def worker_counts():
+    """1, 2, 4, ... up to the number of CPUs, which is always included."""
+    cpus = min(os.cpu_count(), MAX_WORKERS)
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cpus:
+        counts.append(cpus)
+    return counts
+
+
+if __name__ == '__main__':
+    counts = worker_counts()
+    rng = np.random.default_rng(0)
+    images = rng.integers(0, 256, (IMAGES_PER_WORKER * counts[-1],) + SHAPE).astype(np.float64)
+    out_shape = (SHAPE[0] + 2, SHAPE[1] + 2)
+    print(f'canny on {len(images)} images of {SHAPE[1]}x{SHAPE[0]}, {os.cpu_count()} CPUs\n')
+
+    start = time.perf_counter()
+    for img in images:
+        edge_detector.canny(img, LOW_THRESHOLD, HIGH_THRESHOLD, KERNEL_SIZE)
+    serial_time = time.perf_counter() - start
+    print(f'{"serial":>10} {serial_time:8.2f}s')
+
+    for workers in counts:
+        with batch.BatchRunner(workers) as runner:
+            # warm up the pool, so process start up is not measured
+            runner.run(edge_detector.canny, images[:workers], LOW_THRESHOLD, HIGH_THRESHOLD, KERNEL_SIZE,
+                       out_shape=out_shape, out_dtype=np.float64)
+            start = time.perf_counter()
+            runner.run(edge_detector.canny, images, LOW_THRESHOLD, HIGH_THRESHOLD, KERNEL_SIZE,
+                       out_shape=out_shape, out_dtype=np.float64)
+            elapsed = time.perf_counter() - start
+        speedup = serial_time / elapsed
+        print(f'{workers:>3} workers {elapsed:8.2f}s  speedup {speedup:5.1f}x  efficiency {speedup / workers:5.0%}')
@@ -1 +1,4 @@
+# bump whenever the output of an operator changes, it invalidates results cached on disk (see cache.py)
+__version__ = '0.1.1'
+
 from .improutils import *
\ No newline at end of file
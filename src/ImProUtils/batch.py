@@ -0,0 +1,189 @@
+"""
+ImProUtils.batch module
+=======================
+
+Description:
+------------
+Process-pool batch runner for applying an operator to a stack of images.
+The input stack and the results live in multiprocessing.shared_memory blocks, so workers receive
+only block names and image indices instead of pickled arrays, and write their results in place.
+The worker pool is persistent and reused across calls.
+
+Author:
+-------
+Yuval Shaffir
+
+Date:
+-----
+19/10/2026
+"""
+
+# Imports
+import os
+import sys
+import atexit
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory, resource_tracker
+import numpy as np
+
+EMPTY_STACK_ERR = 'Image stack is empty'
+NOT_A_STACK_ERR = 'Images must be matrices, got a flat array (E.g. images_from_folder returns one)'
+SAME_SHAPE_ERR = 'All images must have the same shape'
+POSITIVE_WORKERS_ERR = 'Number of workers must be positive'
+CLOSED_RUNNER_ERR = 'BatchRunner is closed'
+
+# number of chunks each worker gets, more chunks balance the load better
+CHUNKS_PER_WORKER = 4
+
+
+def _shared_array(shape, dtype):
+    """Returns a new shared memory block and an array backed by it."""
+    dtype = np.dtype(dtype)
+    block = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def _attach(name):
+    """Attaches to an existing shared memory block, which stays owned (and unlinked) by the parent."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    block = shared_memory.SharedMemory(name=name)
+    # attaching registers the block with the resource tracker, as if this process had created it
+    resource_tracker.unregister(block._name, 'shared_memory')
+    return block
+
+
+def _run_chunk(func, src, dst, start, stop, args, kwargs):
+    """Worker task: writes func(image, *args, **kwargs) of the images in [start, stop) into the output block.
+    :param src: (name, shape, dtype) of the input block
+    :param dst: (name, shape, dtype) of the output block
+    """
+    src_block = _attach(src[0])
+    dst_block = _attach(dst[0])
+    try:
+        images = np.ndarray(src[1], dtype=src[2], buffer=src_block.buf)
+        results = np.ndarray(dst[1], dtype=dst[2], buffer=dst_block.buf)
+        for i in range(start, stop):
+            results[i] = func(images[i], *args, **kwargs)
+        # drop the views before closing, the blocks can't be closed while exported
+        del images, results
+    finally:
+        src_block.close()
+        dst_block.close()
+
+
+class BatchRunner:
+    """Applies operators to image stacks using a persistent pool of worker processes."""
+
+    def __init__(self, workers=None):
+        """
+        :param workers: number of worker processes, None for the number of CPUs
+        """
+        workers = os.cpu_count() if workers is None else workers
+        if workers < 1:
+            raise ValueError(POSITIVE_WORKERS_ERR)
+
+        self.workers = workers
+        self._executor = ProcessPoolExecutor(max_workers=workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def run(self, func, images, *args, out_shape=None, out_dtype=None, **kwargs):
+        """Returns the stack of func(image, *args, **kwargs) for every image in the stack.
+        :param func: the operator, must be a module level function (E.g. edge_detector.canny)
+        :param images: stack of same shaped images (3D matrix or list of matrices)
+        :param out_shape: shape of a single result, if given with out_dtype every image is computed by the workers,
+                          otherwise the first image is computed here to find them
+        :param out_dtype: type of the results
+        :return: matrix whose i-th entry is the result of the i-th image
+        """
+        if self._executor is None:
+            raise RuntimeError(CLOSED_RUNNER_ERR)
+        if len(images) == 0:
+            raise ValueError(EMPTY_STACK_ERR)
+        if np.ndim(images[0]) < 2:
+            raise ValueError(NOT_A_STACK_ERR)
+        if len({np.shape(img) for img in images}) != 1:
+            raise ValueError(SAME_SHAPE_ERR)
+
+        first = None
+        if out_shape is None or out_dtype is None:
+            first = np.asarray(func(np.asarray(images[0]), *args, **kwargs))
+            out_shape, out_dtype = first.shape, first.dtype
+
+        src_block = dst_block = None
+        try:
+            src_block, src = _shared_array((len(images),) + np.shape(images[0]), np.asarray(images[0]).dtype)
+            dst_block, dst = _shared_array((len(images),) + tuple(out_shape), out_dtype)
+            for i, img in enumerate(images):
+                src[i] = img
+
+            # dispatch the (rest of the) stack by index ranges
+            begin = 0
+            if first is not None:
+                dst[0] = first
+                begin = 1
+            chunk = max(1, -(-(len(images) - begin) // (self.workers * CHUNKS_PER_WORKER)))
+            futures = [self._executor.submit(_run_chunk, func,
+                                             (src_block.name, src.shape, src.dtype.str),
+                                             (dst_block.name, dst.shape, dst.dtype.str),
+                                             start, min(start + chunk, len(images)), args, kwargs)
+                       for start in range(begin, len(images), chunk)]
+            try:
+                for future in futures:
+                    # re-raises errors from the workers
+                    future.result()
+            except BaseException as err:
+                # free the pool for the next call, and let the running chunks finish before the
+                # blocks they are attached to are unlinked
+                for future in futures:
+                    future.cancel()
+                wait(futures)
+                if isinstance(err, BrokenProcessPool):
+                    # a worker died, the pool can't run anything anymore
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                raise
+
+            return dst.copy()
+        finally:
+            # drop the views before closing, the blocks can't be closed while exported
+            src = dst = None
+            for block in (src_block, dst_block):
+                if block is not None:
+                    block.close()
+                    block.unlink()
+
+    def close(self, wait=True):
+        """Shuts the worker pool down.
+        :param wait: if True, wait for the running tasks to finish
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+_default_runner = None
+
+
+def run_batch(func, images, *args, **kwargs):
+    """Returns the stack of func(image, *args, **kwargs) for every image in the stack,
+    using a worker pool that is shared across calls (see BatchRunner.run).
+    """
+    global _default_runner
+    if _default_runner is None:
+        _default_runner = BatchRunner()
+    return _default_runner.run(func, images, *args, **kwargs)
+
+
+@atexit.register
+def shutdown():
+    """Shuts the shared worker pool down, it is recreated by the next run_batch call."""
+    global _default_runner
+    if _default_runner is not None:
+        _default_runner.close()
+        _default_runner = None
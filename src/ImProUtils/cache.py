@@ -0,0 +1,290 @@
+"""
+ImProUtils.cache module
+=======================
+
+Description:
+------------
+Optional memoization layer for expensive operators (canny, sobel derivatives, laplacian).
+Results are keyed on (image content hash, function, parameters, library version) and kept
+in an in-memory LRU with a byte budget, with an optional on-disk tier of .npy files.
+Cache hits are returned as read-only arrays, without copying.
+
+Author:
+-------
+Yuval Shaffir
+
+Date:
+-----
+19/10/2026
+"""
+
+# Imports
+import os
+import hashlib
+import inspect
+import tempfile
+import functools
+import types
+from collections import OrderedDict
+import numpy as np
+from src.ImProUtils import __version__
+import src.ImProUtils.filters as filters
+import src.ImProUtils.edge_detector as edge_detector
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# number of memory mapped disk hits kept open, they take no memory but hold their files
+MAX_MAPPED = 64
+
+POSITIVE_BUDGET_ERR = 'max_bytes must be positive'
+OBJECT_ARRAY_ERR = 'Cannot hash arrays of dtype object'
+UNHASHABLE_ARG_ERR = 'Cannot hash argument of type {}, only arrays, scalars, strings and containers of them are supported'
+
+# arguments hashed by their repr, which is value based for these types
+VALUE_TYPES = (type(None), bool, int, float, complex, str, bytes, np.generic, np.dtype)
+
+
+def _new_hasher():
+    """Returns a fast non-cryptographic hasher (xxhash if installed, otherwise blake2b)."""
+    if xxhash is not None:
+        return xxhash.xxh3_128()
+    return hashlib.blake2b(digest_size=16)
+
+
+def _update_with_array(hasher, arr):
+    """Feeds the dtype, shape and raw buffer of the array into the hasher."""
+    if arr.dtype == object:
+        raise TypeError(OBJECT_ARRAY_ERR)
+    arr = np.ascontiguousarray(arr)
+    hasher.update(f'{arr.dtype.str}{arr.shape}'.encode())
+    hasher.update(memoryview(arr).cast('B'))
+
+
+def _update_with_arg(hasher, arg):
+    """Feeds an argument into the hasher, tagged with its type so E.g. 1, 1.0 and True differ."""
+    hasher.update(type(arg).__name__.encode())
+    if isinstance(arg, np.ndarray):
+        _update_with_array(hasher, arg)
+    elif isinstance(arg, (list, tuple)):
+        hasher.update(f'[{len(arg)}]'.encode())
+        for item in arg:
+            _update_with_arg(hasher, item)
+    elif isinstance(arg, dict):
+        hasher.update(f'{{{len(arg)}}}'.encode())
+        for name in sorted(arg, key=repr):
+            _update_with_arg(hasher, name)
+            _update_with_arg(hasher, arg[name])
+    elif isinstance(arg, VALUE_TYPES):
+        hasher.update(f'({arg!r})'.encode())
+    else:
+        # E.g. the default repr contains the memory address, which is not reproducible
+        raise TypeError(UNHASHABLE_ARG_ERR.format(type(arg).__name__))
+
+
+def _update_with_code(hasher, code):
+    """Feeds the bytecode and constants of a code object (and its nested code objects) into the hasher."""
+    hasher.update(code.co_code)
+    hasher.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            _update_with_code(hasher, const)
+        elif isinstance(const, frozenset):
+            # the iteration order of a set is not reproducible between sessions
+            hasher.update(repr(sorted(map(repr, const))).encode())
+        else:
+            hasher.update(repr(const).encode())
+
+
+def _update_with_func(hasher, func):
+    """Feeds the identity of a function into the hasher: its name, code and closure values.
+    The code distinguishes lambdas and nested functions sharing a qualname, and edited functions."""
+    hasher.update(f'{func.__module__}.{func.__qualname__}'.encode())
+    code = getattr(func, '__code__', None)
+    if code is None:
+        # builtins and C functions, identified by their name only
+        return
+    _update_with_code(hasher, code)
+    for cell in func.__closure__ or ():
+        try:
+            value = cell.cell_contents
+        except ValueError:
+            # an empty cell
+            continue
+        if inspect.isfunction(value):
+            _update_with_func(hasher, value)
+        else:
+            _update_with_arg(hasher, value)
+
+
+def _arrays_in(arg):
+    """Returns the arrays in an argument, including the ones nested in lists, tuples and dicts."""
+    if isinstance(arg, np.ndarray):
+        return [arg]
+    if isinstance(arg, (list, tuple)):
+        return [arr for item in arg for arr in _arrays_in(item)]
+    if isinstance(arg, dict):
+        return [arr for item in arg.values() for arr in _arrays_in(item)]
+    return []
+
+
+def make_key(func, args, kwargs):
+    """Returns the cache key of calling func(*args, **kwargs).
+    The call is normalised with the signature of func, so positional, keyword and default
+    arguments of the same value give the same key. Arrays are hashed by content, and func
+    by its code and closure values.
+    :param func: the cached function
+    :param args: positional arguments of the call
+    :param kwargs: keyword arguments of the call
+    :return: hex digest identifying the call
+    """
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+
+    hasher = _new_hasher()
+    hasher.update(f'{__version__}:'.encode())
+    _update_with_func(hasher, func)
+    for name, arg in bound.arguments.items():
+        hasher.update(name.encode())
+        _update_with_arg(hasher, arg)
+    return hasher.hexdigest()
+
+
+class MemoCache:
+    """In-memory LRU of operator results with a byte budget and an optional on-disk tier.
+    Disk hits are memory mapped and kept in a separate LRU of at most MAX_MAPPED entries,
+    outside the byte budget since they take no memory."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, cache_dir=None):
+        """
+        :param max_bytes: byte budget of the in-memory tier
+        :param cache_dir: directory for the on-disk tier, or None to keep results in memory only
+        """
+        if max_bytes <= 0:
+            raise ValueError(POSITIVE_BUDGET_ERR)
+
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._mapped = OrderedDict()
+
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries) + len(self._mapped)
+
+    def __contains__(self, key):
+        return key in self._entries or key in self._mapped or (self.cache_dir is not None and os.path.isfile(self._disk_path(key)))
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, key + '.npy')
+
+    def _remember(self, key, value):
+        """Stores value in the in-memory tier, evicting least recently used entries if needed."""
+        if value.nbytes > self.max_bytes:
+            return
+        if key in self._entries:
+            self.nbytes -= self._entries.pop(key).nbytes
+
+        self._entries[key] = value
+        self.nbytes += value.nbytes
+        while self.nbytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+
+    def get(self, key):
+        """Returns the cached read-only result of key, or None on a miss."""
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+        value = self._mapped.get(key)
+        if value is not None:
+            self._mapped.move_to_end(key)
+            self.hits += 1
+            return value
+
+        if self.cache_dir is not None and os.path.isfile(self._disk_path(key)):
+            # memory mapped in read-only mode, so the hit is not copied into memory
+            value = np.load(self._disk_path(key), mmap_mode='r')
+            self._mapped[key] = value
+            if len(self._mapped) > MAX_MAPPED:
+                self._mapped.popitem(last=False)
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        """Caches value under key and returns it as a read-only array."""
+        # a read-only view, so the operator's own result stays writeable
+        value = np.asarray(value).view()
+        value.setflags(write=False)
+        self._remember(key, value)
+
+        if self.cache_dir is not None:
+            # write to a unique temporary file first, so readers never see a partial result,
+            # even when several processes write the same key
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.save(f, value)
+                os.replace(tmp_path, self._disk_path(key))
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        return value
+
+    def clear(self, disk=False):
+        """Empties the in-memory tier, and the on-disk tier if disk is True."""
+        self._entries.clear()
+        # drops the maps held here, so their files can be deleted
+        self._mapped.clear()
+        self.nbytes = 0
+        if disk and self.cache_dir is not None:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.npy'):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+
+default_cache = MemoCache()
+
+
+def memoize(func, cache=None):
+    """Returns a version of func whose results are memoized.
+    :param func: the function to memoize, must return a numpy array
+    :param cache: the MemoCache to use, or None for the module's default cache
+    :return: the memoized function
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        used_cache = default_cache if cache is None else cache
+        key = make_key(func, args, kwargs)
+        value = used_cache.get(key)
+        if value is None:
+            value = func(*args, **kwargs)
+            # a result sharing memory with an argument (E.g. the input itself) would change with it
+            arguments = _arrays_in(args) + _arrays_in(kwargs)
+            if any(np.shares_memory(value, arr) for arr in arguments):
+                value = np.array(value)
+            value = used_cache.put(key, value)
+        return value
+
+    return wrapper
+
+
+# memoized operators
+canny = memoize(edge_detector.canny)
+sobel_x_derivative = memoize(filters.sobel_x_derivative)
+sobel_y_derivative = memoize(filters.sobel_y_derivative)
+laplacian = memoize(filters.laplacian)
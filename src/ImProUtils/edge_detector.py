@@ -2,6 +2,62 @@ import numpy as np
 import scipy.ndimage as ndimage
 import src.ImProUtils.filters as filters
 import cv2
+from skimage import color
+
+
+TILE_SIZE_ERR = 'tile_size must be positive'
+
+
+SOBEL_X_KERNEL = np.outer(np.array([1, 2, 1]), np.array([1, 0, -1]))
+SOBEL_Y_KERNEL = SOBEL_X_KERNEL.T
+
+
+def _allocate(shape):
+    """Returns the buffers of the canny steps for images of the given shape (or smaller)."""
+    full_shape = (shape[0] + 2, shape[1] + 2)
+    return {
+        'padded': np.zeros(full_shape),
+        'sobel_x': np.empty(full_shape),
+        'sobel_y': np.empty(full_shape),
+        'magnitude': np.empty(full_shape),
+        'direction': np.empty(full_shape),
+        'quantized': np.empty(full_shape, dtype=np.int64),
+        'suppressed': np.empty(full_shape),
+        'edges': np.empty(full_shape),
+    }
+
+
+def _canny_steps(img, low_threshold, high_threshold, gaussian_kernel, buffers, out=None):
+    """Runs the canny steps on a grayscale image, writing every step into views of the buffers.
+    :param buffers: buffers from _allocate, for the image's shape or bigger
+    :param out: if given, the edges are written into it instead of the edges buffer
+    :return: the edges detected in the image (shape of the image + 2, like a full convolution)
+    """
+    rows, cols = img.shape[0] + 2, img.shape[1] + 2
+    steps = {name: buffer[:rows, :cols] for name, buffer in buffers.items()}
+
+    # Blur the image into the center of a zero padded buffer, so a 'same' convolution over it
+    # is the 'full' convolution of the sobel filters
+    padded = steps['padded']
+    padded[-1, :] = 0
+    padded[:, -1] = 0
+    ndimage.convolve(img, gaussian_kernel, output=padded[1:-1, 1:-1])
+
+    # x derivative and y derivative using sobel
+    sobel_x = ndimage.convolve(padded, SOBEL_X_KERNEL, output=steps['sobel_x'], mode='constant')
+    sobel_y = ndimage.convolve(padded, SOBEL_Y_KERNEL, output=steps['sobel_y'], mode='constant')
+
+    # gradient magnitude and direction matrix
+    grad_mag_mat = filters.gradient_magnitude(sobel_x, sobel_y, out=steps['magnitude'])
+    grad_dir_mat = filters.gradient_direction(sobel_x, sobel_y, out=steps['direction'])
+    quantized_dir_mat = filters.direction_quantization(grad_dir_mat, out=steps['quantized'])
+
+    # non-maximum suppression
+    suppressed_matrix = filters.non_maximum_suppression(grad_mag_mat, quantized_dir_mat, out=steps['suppressed'])
+
+    # hysteresis thresholding
+    return filters.hysteresis_thresholding(suppressed_matrix, low_threshold, high_threshold,
+                                           out=steps['edges'] if out is None else out)
 
 
 def canny(img, low_threshold, high_threshold, kernel_size, sigma=1):
@@ -13,26 +69,139 @@ def canny(img, low_threshold, high_threshold, kernel_size, sigma=1):
     :param sigma: the sigma value for the gaussian blur
     :return: the edges detected in the image
     """
+    # grayscale the image
+    if len(img.shape) == 3:
+        img = color.rgb2gray(img)
 
-    # Blur the image
-    blurred_img = ndimage.convolve(img, filters.gaussian_kernel2d(kernel_size, sigma))
+    return _canny_steps(img, low_threshold, high_threshold, filters.gaussian_kernel2d(kernel_size, sigma),
+                        _allocate(img.shape))
 
-    # x derivative and y derivative using sobel
-    sobel_x = filters.sobel_x_derivative(blurred_img)
-    sobel_y = filters.sobel_y_derivative(blurred_img)
 
-    # gradient magnitude and direction matrix
-    grad_mag_mat = filters.gradient_magnitude(sobel_x, sobel_y)
-    grad_dir_mat = filters.gradient_direction(sobel_x, sobel_y)
-    quantized_dir_mat = filters.direction_quantization(grad_dir_mat)
+class StreamingCanny:
+    """Canny edge detector for frame streams.
+    Buffers are allocated once and reused across frames of the same shape. In temporal mode, edges are
+    recomputed only in tiles whose pixels changed by more than change_threshold since they were last
+    computed, which is much faster on mostly static sequences.
+    The output equals canny frame by frame, except in temporal mode with a positive change_threshold:
+    there the edges of a tile may be those of an earlier frame, differing from the current one by up to
+    change_threshold per pixel.
+    The returned edges matrix is owned by the detector and is overwritten by the next frame.
+    """
 
-    # non-maximum suppression
-    suppressed_matrix = filters.non_maximum_suppression(grad_mag_mat, quantized_dir_mat)
+    def __init__(self, low_threshold, high_threshold, kernel_size, sigma=1, temporal=False, tile_size=32,
+                 change_threshold=0):
+        """
+        :param low_threshold: the low threshold
+        :param high_threshold: the high threshold
+        :param kernel_size: size of the gaussian kernel
+        :param sigma: the sigma value for the gaussian blur
+        :param temporal: if True, recompute edges only in tiles that changed since the previous frame
+        :param tile_size: side of the square tiles compared between frames in temporal mode
+        :param change_threshold: a pixel changed if its absolute difference is bigger than this value
+        """
+        if tile_size < 1:
+            raise ValueError(TILE_SIZE_ERR)
 
-    # hysteresis thresholding
-    edges = filters.hysteresis_thresholding(suppressed_matrix, low_threshold, high_threshold)
+        self.low_threshold = low_threshold
+        self.high_threshold = high_threshold
+        self.temporal = temporal
+        self.tile_size = tile_size
+        self.change_threshold = change_threshold
+        self.gaussian_kernel = filters.gaussian_kernel2d(kernel_size, sigma)
+        # an edge pixel depends on pixels up to the blur radius + sobel + suppression + hysteresis away
+        self.halo = kernel_size // 2 + 3
+
+        self._buffers = None
+        self._reference = None
+        self.edges = None
+
+    def _detect(self, img, out=None):
+        """Runs canny on img (the frame or a window of it) using the detector's buffers."""
+        return _canny_steps(img, self.low_threshold, self.high_threshold, self.gaussian_kernel, self._buffers, out)
+
+    def _dirty_regions(self, frame):
+        """Returns the slices (in frame coordinates) of the regions whose edges must be recomputed."""
+        tile = self.tile_size
+        rows = -(-frame.shape[0] // tile)
+        cols = -(-frame.shape[1] // tile)
+
+        # the difference is computed in the (free until the next detection) magnitude buffer
+        diff = self._buffers['magnitude'][:frame.shape[0], :frame.shape[1]]
+        np.subtract(frame, self._reference, out=diff)
+        np.abs(diff, out=diff)
+        changed = diff > self.change_threshold
+        # pad to whole tiles and check each tile for a changed pixel
+        changed = np.pad(changed, ((0, rows * tile - frame.shape[0]), (0, cols * tile - frame.shape[1])))
+        dirty_tiles = changed.reshape(rows, tile, cols, tile).any(axis=(1, 3))
+
+        # a change affects the edges of neighboring tiles within the halo
+        reach = -(-self.halo // tile)
+        dirty_tiles = ndimage.binary_dilation(dirty_tiles, np.ones((2 * reach + 1, 2 * reach + 1)))
+
+        # recompute each connected group of dirty tiles as one region
+        labels, _ = ndimage.label(dirty_tiles)
+        return [(slice(r.start * tile, min(r.stop * tile, frame.shape[0])),
+                 slice(c.start * tile, min(c.stop * tile, frame.shape[1])))
+                for r, c in ndimage.find_objects(labels)]
+
+    def _update_region(self, frame, region):
+        """Recomputes the edges of the given region of the frame in place."""
+        height, width = frame.shape
+        rows, cols = region
+
+        # the window around the region, including the pixels the region's edges depend on
+        win_rows = slice(max(0, rows.start - self.halo), min(height, rows.stop + self.halo))
+        win_cols = slice(max(0, cols.start - self.halo), min(width, cols.stop + self.halo))
+        window_edges = self._detect(frame[win_rows, win_cols])
+
+        # edges are shifted by one pixel (full convolution), the frame's border also owns the outer ring
+        out_rows = slice(0 if rows.start == 0 else rows.start + 1, height + 2 if rows.stop == height else rows.stop + 1)
+        out_cols = slice(0 if cols.start == 0 else cols.start + 1, width + 2 if cols.stop == width else cols.stop + 1)
+        self.edges[out_rows, out_cols] = window_edges[out_rows.start - win_rows.start:out_rows.stop - win_rows.start,
+                                                      out_cols.start - win_cols.start:out_cols.stop - win_cols.start]
+        self._reference[rows, cols] = frame[rows, cols]
 
-    return edges
+    def process(self, frame):
+        """Returns the edges detected in the frame.
+        :param frame: the next frame of the stream (matrix form)
+        :return: the edges detected in the frame, overwritten by the next call
+        """
+        # grayscale the frame
+        if len(frame.shape) == 3:
+            frame = color.rgb2gray(frame)
+
+        if self._buffers is None or self._reference.shape != frame.shape:
+            # first frame, or the stream changed shape
+            self._buffers = _allocate(frame.shape)
+            self._reference = np.array(frame, dtype=np.float64)
+            self.edges = np.empty((frame.shape[0] + 2, frame.shape[1] + 2))
+            return self._detect(frame, self.edges)
+
+        if not self.temporal:
+            return self._detect(frame, self.edges)
+
+        for region in self._dirty_regions(frame):
+            self._update_region(frame, region)
+        return self.edges
+
+
+def canny_stream(frames, low_threshold, high_threshold, kernel_size, sigma=1, temporal=False, tile_size=32,
+                 change_threshold=0):
+    """Returns the canny edge detector of every frame in a stream.
+    :param frames: iterable of frames (E.g. from image.frames_from_file or image.frames_from_stream)
+    :param low_threshold: the low threshold
+    :param high_threshold: the high threshold
+    :param kernel_size: size of the gaussian kernel
+    :param sigma: the sigma value for the gaussian blur
+    :param temporal: if True, recompute edges only in tiles that changed since the previous frame
+    :param tile_size: side of the square tiles compared between frames in temporal mode
+    :param change_threshold: a pixel changed if its absolute difference is bigger than this value
+    :return: generator of the edges detected in each frame, each overwritten by the next one
+    """
+    detector = StreamingCanny(low_threshold, high_threshold, kernel_size, sigma, temporal, tile_size,
+                              change_threshold)
+    for frame in frames:
+        yield detector.process(frame)
 
 
 def harris():
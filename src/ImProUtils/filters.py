@@ -77,66 +77,86 @@ def sobel_y_derivative(img):
     return sobel_y
 
 
-def gradient_magnitude(grad_x, grad_y):
-    """Returns the gradient magnitude of the image using the x and y derivatives."""
+def gradient_magnitude(grad_x, grad_y, out=None):
+    """Returns the gradient magnitude of the image using the x and y derivatives.
+    If out is given, the result is written into it."""
     # validate input:
     if grad_x.shape != grad_y.shape:
         raise ValueError(SAME_SHAPE_ERR)
 
-    return np.sqrt(grad_x ** 2 + grad_y ** 2)
+    # hypot does not overflow like squaring does
+    return np.hypot(grad_x, grad_y, out=out)
 
 
-def gradient_direction(grad_x, grad_y):
-    """Returns the gradient direction of the image using the x and y derivatives."""
+def gradient_direction(grad_x, grad_y, out=None):
+    """Returns the gradient direction of the image using the x and y derivatives, in the range [0, 180].
+    If out is given, the result is written into it."""
     if grad_x.shape != grad_y.shape:
         raise ValueError(SAME_SHAPE_ERR)
 
-    res = np.arctan2(grad_y, grad_x).astype(np.float16) * 180 / np.pi
-    res[np.where(res < 0)] += 180
+    res = np.arctan2(grad_y, grad_x, out=out)
+    res *= 180 / np.pi
+    np.add(res, 180, out=res, where=res < 0)
     return res
 
 
-def direction_quantization(directions):
-    """Returns the quantized direction of the image using the gradient direction."""
+def direction_quantization(directions, out=None):
+    """Returns the quantized direction of the image using the gradient direction.
+    If out is given, the result is written into it."""
     inner_bins = np.array([0, 22.5, 45, 67.5, 90, 112.5, 135, 157.5, 180])
-    bins = np.array([0, 45, 90, 135, 180])
+    bins = np.array([0, 45, 90, 135, 180], dtype=np.int64)
     # for each value in the directions array, find the bin it belongs to (index in the bins array)
     inner_bin_indices = np.digitize(directions, inner_bins, right=False)
+    # exactly 180 is past the last bin, it belongs with the values right below it
+    np.minimum(inner_bin_indices, len(inner_bins) - 1, out=inner_bin_indices)
 
     bin_indices = np.digitize(inner_bins[inner_bin_indices], bins, right=False)
 
     # for each cell in the membership matrix (i, j) set the value to the bin value
     # The -1 is because the digitize returns out of bounds indices
-    return bins[bin_indices-1]
+    return np.take(bins, bin_indices - 1, out=out)
 
 
-def non_maximum_suppression(grad_matrix, phase_matrix):
+def non_maximum_suppression(grad_matrix, phase_matrix, out=None):
+    """Returns the gradient magnitude, zeroed where it is not a maximum across the edge.
+    :param grad_matrix: the gradient magnitude
+    :param phase_matrix: the quantized gradient direction (0, 45, 90, 135 or 180)
+    :param out: if given, the result is written into it
+    :return: the suppressed gradient magnitude
+    """
     # validate arguments:
     if grad_matrix.shape != phase_matrix.shape:
         raise ValueError(SAME_SHAPE_ERR)
 
-    suppressed_matrix = np.zeros(grad_matrix.shape)
+    if out is None:
+        suppressed_matrix = np.zeros(grad_matrix.shape)
+    else:
+        suppressed_matrix = out
+        suppressed_matrix[...] = 0
+    # zero padding, so pixels on the border have neighbors (index (i, j) is (i + 1, j + 1) in the padded matrix)
+    padded = np.pad(grad_matrix, 1)
 
+    # the neighbors are compared across the edge, along the gradient (x is along the columns, y along the rows)
     for i in range(grad_matrix.shape[0]):
         for j in range(grad_matrix.shape[1]):
             current_value = grad_matrix[i][j]
             angle = phase_matrix[i][j]
             neighbors = []
-            if angle == 0:
-                # 0 degrees - horizontal edge
-                neighbors = grad_matrix[i - 1: i + 1][j]
+            if angle == 0 or angle == 180:
+                # 0 degrees - horizontal gradient, vertical edge
+                neighbors = [padded[i + 1][j], padded[i + 1][j + 2]]
 
             elif angle == 45:
                 # 45 degrees - diagonal edge
-                neighbors = [grad_matrix[i+1][j-1], grad_matrix[i-1][j+1]]
+                neighbors = [padded[i][j], padded[i + 2][j + 2]]
 
             elif angle == 90:
-                # 90 degrees - vertical edge
-                neighbors = grad_matrix[i][j - 1: j + 1]
+                # 90 degrees - vertical gradient, horizontal edge
+                neighbors = [padded[i][j + 1], padded[i + 2][j + 1]]
 
-            elif angle == 135 :
+            elif angle == 135:
                 # 135 degrees - diagonal edge
-                neighbors = [grad_matrix[i - 1][j - 1], grad_matrix[i + 1][j + 1]]
+                neighbors = [padded[i + 2][j], padded[i][j + 2]]
 
             if current_value >= np.max(neighbors):
                 # zero out the neighbors
@@ -145,11 +165,12 @@ def non_maximum_suppression(grad_matrix, phase_matrix):
     return suppressed_matrix
 
 
-def hysteresis_thresholding(suppressed_matrix, low_val, high_val):
+def hysteresis_thresholding(suppressed_matrix, low_val, high_val, out=None):
     """Returns the hysteresis thresholding of the image using the low and high thresholds.
     :param suppressed_matrix: the matrix after non-maximum suppression
     :param low_val: the low threshold
     :param high_val: the high threshold
+    :param out: if given, the edges are written into it
     :return: the edges of the image
     """
     # validate arguments:
@@ -162,7 +183,11 @@ def hysteresis_thresholding(suppressed_matrix, low_val, high_val):
     weak_edges = (suppressed_matrix >= low_val) & (suppressed_matrix < high_val)
 
     # find weak edges that are connected to strong edges
-    edges = np.zeros(suppressed_matrix.shape)
+    if out is None:
+        edges = np.zeros(suppressed_matrix.shape)
+    else:
+        edges = out
+        edges[...] = 0
     edges[strong_edges] = 1
     for i in range(1, edges.shape[0] - 1):
         for j in range(1, edges.shape[1] - 1):
@@ -40,7 +40,7 @@ F (32-bit floating point pixels)
 # Imports
 import os
 from tqdm import tqdm
-from PIL import Image
+from PIL import Image, ImageSequence
 import numpy as np
 import urllib.request
 from skimage import color
@@ -49,6 +49,7 @@ SUCCESS_MSG = 'Importing Success!\n'
 ARRAY_IS_NULL_ERR = 'Array is null!\n'
 POSITIVE_VAL_ERR = 'Number of columns must be positive!\n'
 MUST_BE_LIST_ERR = 'Array must be a list!\n'
+POSITIVE_SHAPE_ERR = 'Frame dimensions must be positive!\n'
 
 
 def image_from_file(path, mode='RGB', err_raise=True, print_info=True):
@@ -105,6 +106,69 @@ def images_from_folder(path, mode='RGB', err_raise=True, print_info=True):
     return lst
 
 
+def frames_from_file(path, mode='RGB', print_info=True):
+    """
+    Iterate over the frames of a multi-frame file (E.g. GIF, TIFF stack, FLI).
+    Frames are decoded lazily, one at a time, so long sequences are never fully loaded into memory.
+    Single-frame files yield a single frame.
+
+    :param: path: path to the file. format must be one of the accepted formats (see description).
+    :param: mode: mode every frame is converted to (E.g. RGB, L, etc.. more info in the description).
+    :param: print_info: if True, print info about the progress.
+    :return: generator of frame matrices, in the same form as image_from_file returns.
+    """
+    # check if file exists
+    path = os.path.abspath(path)
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f'Path: {path} not found!\n')
+
+    with Image.open(path) as img:
+        if print_info:
+            print(SUCCESS_MSG)
+
+        for frame in ImageSequence.Iterator(img):
+            # palette frames (E.g. GIF) are only meaningful after conversion
+            frame = frame.convert(mode)
+            # modes with more than 3 bands (E.g. RGBA, CMYK) are grayscaled through RGB
+            if len(frame.getbands()) > 3:
+                frame = frame.convert('RGB')
+            frame = np.array(frame)
+            if len(frame.shape) == 3:
+                frame = color.rgb2gray(frame)
+            yield frame
+
+
+def frames_from_stream(stream, height, width, channels=1, dtype=np.uint8):
+    """
+    Iterate over the frames of a raw frame stream (E.g. the stdout of a video decoder).
+    Frames are expected to be stored back to back, in row major order, without headers.
+
+    :param: stream: binary file-like object to read the frames from.
+    :param: height: number of rows in a frame.
+    :param: width: number of columns in a frame.
+    :param: channels: number of channels in a frame, 1 for grayscale.
+    :param: dtype: type of a single pixel value.
+    :return: generator of frame matrices, of shape (height, width) or (height, width, channels).
+    """
+    # validate input
+    if height < 1 or width < 1 or channels < 1:
+        raise ValueError(POSITIVE_SHAPE_ERR)
+
+    shape = (height, width) if channels == 1 else (height, width, channels)
+    frame_size = height * width * channels * np.dtype(dtype).itemsize
+
+    while True:
+        # pipes may return less than asked for, read until the frame is full
+        data = bytearray()
+        while len(data) < frame_size:
+            chunk = stream.read(frame_size - len(data))
+            if not chunk:
+                # a partial frame at the end of the stream is dropped
+                return
+            data += chunk
+        yield np.frombuffer(data, dtype=dtype).reshape(shape)
+
+
 def img_from_1d_array(arr, cols):
     """
     Create an 2D matrix representing a grayscale image from a 1D array.
@@ -17,6 +17,8 @@ Date:
 
 import unittest
 import os
+import io
+import tempfile
 import numpy as np
 from PIL import Image
 import PIL
@@ -90,5 +92,64 @@ class TestImageFromUrl(unittest.TestCase):
     pass
 
 
+class TestFramesFromFile(unittest.TestCase):
+    def test_multi_frame_gif(self):
+        frames = [Image.fromarray(np.full((8, 10), i * 50, dtype=np.uint8)) for i in range(4)]
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'frames.gif')
+            frames[0].save(path, save_all=True, append_images=frames[1:])
+
+            lst = list(ImProImage.frames_from_file(path, 'L', print_info=False))
+        self.assertEqual(len(lst), 4)
+        for i, frame in enumerate(lst):
+            self.assertEqual(frame.shape, (8, 10))
+            self.assertTrue(np.all(frame == i * 50))
+
+    def test_multi_band_modes(self):
+        frames = [Image.fromarray(np.full((8, 10, 3), i * 50, dtype=np.uint8)) for i in range(2)]
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'frames.tiff')
+            frames[0].save(path, save_all=True, append_images=frames[1:])
+
+            for mode in ('RGB', 'RGBA', 'CMYK'):
+                lst = list(ImProImage.frames_from_file(path, mode, print_info=False))
+                self.assertEqual(len(lst), 2)
+                for frame in lst:
+                    self.assertEqual(frame.shape, (8, 10))
+
+    def test_illegal_file_path(self):
+        with self.assertRaises(FileNotFoundError):
+            next(ImProImage.frames_from_file('illegal_file_path'))
+
+
+class TestFramesFromStream(unittest.TestCase):
+    def test_raw_stream(self):
+        data = np.arange(3 * 4 * 5 * 3, dtype=np.uint8)
+        # the partial frame at the end is dropped:
+        stream = io.BytesIO(data.tobytes() + b'\x00')
+        lst = list(ImProImage.frames_from_stream(stream, 4, 5, channels=3))
+        self.assertEqual(len(lst), 3)
+        self.assertEqual(lst[0].shape, (4, 5, 3))
+        self.assertTrue(np.all(np.concatenate([f.ravel() for f in lst]) == data))
+
+    def test_short_reads(self):
+        class ShortReadStream:
+            """Returns at most 7 bytes per read, like a pipe may."""
+            def __init__(self, data):
+                self.stream = io.BytesIO(data)
+
+            def read(self, size):
+                return self.stream.read(min(size, 7))
+
+        data = np.arange(2 * 4 * 5, dtype=np.uint8)
+        lst = list(ImProImage.frames_from_stream(ShortReadStream(data.tobytes()), 4, 5))
+        self.assertEqual(len(lst), 2)
+        self.assertTrue(np.all(lst[1].ravel() == data[20:]))
+
+    def test_illegal_shape(self):
+        with self.assertRaises(ValueError):
+            next(ImProImage.frames_from_stream(io.BytesIO(b''), 0, 5))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,102 @@
+import os
+import unittest
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+import src.ImProUtils.batch as ImProBatch
+import src.ImProUtils.filters as ImProFilters
+import src.ImProUtils.edge_detector as ImProEdges
+
+
+def random_stack(count, shape=(24, 32)):
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, (count,) + shape).astype(np.float64)
+
+
+def exit_worker(img):
+    """An operator that kills the worker running it."""
+    os._exit(1)
+
+
+class TestBatchRunner(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.runner = ImProBatch.BatchRunner(workers=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.runner.close()
+
+    def test_matches_serial(self):
+        images = random_stack(9)
+        res = self.runner.run(ImProFilters.laplacian, images)
+        self.assertEqual(res.shape, images.shape)
+        for img, img_res in zip(images, res):
+            self.assertTrue(np.array_equal(img_res, ImProFilters.laplacian(img)))
+
+    def test_canny_with_arguments(self):
+        images = list(random_stack(5))
+        res = self.runner.run(ImProEdges.canny, images, 20, 60, kernel_size=3)
+        for img, img_res in zip(images, res):
+            self.assertTrue(np.array_equal(img_res, ImProEdges.canny(img, 20, 60, kernel_size=3)))
+
+    def test_known_output_shape(self):
+        images = random_stack(6)
+        res = self.runner.run(ImProEdges.canny, images, 20, 60, 3,
+                              out_shape=(images.shape[1] + 2, images.shape[2] + 2), out_dtype=np.float64)
+        for img, img_res in zip(images, res):
+            self.assertTrue(np.array_equal(img_res, ImProEdges.canny(img, 20, 60, 3)))
+
+    def test_pool_is_reused(self):
+        executor = self.runner._executor
+        self.runner.run(ImProFilters.laplacian, random_stack(3))
+        self.runner.run(ImProFilters.laplacian, random_stack(3))
+        self.assertIs(self.runner._executor, executor)
+
+    def test_operator_error_is_raised(self):
+        with self.assertRaises(ValueError):
+            # low threshold bigger than high threshold
+            self.runner.run(ImProEdges.canny, random_stack(3), 60, 20, 3)
+
+    def test_worker_error_is_raised(self):
+        images = random_stack(12)
+        with self.assertRaises(ValueError):
+            # low threshold bigger than high threshold, raised in the workers
+            self.runner.run(ImProEdges.canny, images, 60, 20, 3, out_shape=(26, 34), out_dtype=np.float64)
+        # the pool is still usable:
+        res = self.runner.run(ImProFilters.laplacian, images)
+        self.assertTrue(np.array_equal(res[11], ImProFilters.laplacian(images[11])))
+
+    def test_broken_pool_is_replaced(self):
+        images = random_stack(4)
+        with self.assertRaises(BrokenProcessPool):
+            # the output shape is given, so the operator only runs in the workers
+            self.runner.run(exit_worker, images, out_shape=images.shape[1:], out_dtype=np.float64)
+        res = self.runner.run(ImProFilters.laplacian, images)
+        self.assertTrue(np.array_equal(res[3], ImProFilters.laplacian(images[3])))
+
+    def test_illegal_stacks(self):
+        with self.assertRaises(ValueError):
+            self.runner.run(ImProFilters.laplacian, [])
+        with self.assertRaises(ValueError):
+            self.runner.run(ImProFilters.laplacian, [np.zeros((3, 3)), np.zeros((4, 4))])
+        with self.assertRaises(ValueError):
+            # a flat array, E.g. from images_from_folder
+            self.runner.run(ImProFilters.laplacian, np.zeros(12))
+
+    def test_closed_runner(self):
+        runner = ImProBatch.BatchRunner(workers=1)
+        runner.close()
+        with self.assertRaises(RuntimeError):
+            runner.run(ImProFilters.laplacian, random_stack(2))
+
+
+class TestRunBatch(unittest.TestCase):
+    def test_default_runner(self):
+        images = random_stack(4)
+        res = ImProBatch.run_batch(ImProFilters.laplacian, images)
+        self.assertTrue(np.array_equal(res[3], ImProFilters.laplacian(images[3])))
+        ImProBatch.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import src.ImProUtils.cache as ImProCache
+
+
+def double(img, factor=2):
+    return img * factor
+
+
+class TestMakeKey(unittest.TestCase):
+    def test_same_content_same_key(self):
+        img = np.arange(12, dtype=np.float64).reshape(3, 4)
+        self.assertEqual(ImProCache.make_key(double, (img,), {}),
+                         ImProCache.make_key(double, (img.copy(),), {}))
+
+    def test_different_content_or_params(self):
+        img = np.arange(12, dtype=np.float64).reshape(3, 4)
+        key = ImProCache.make_key(double, (img,), {})
+        self.assertNotEqual(key, ImProCache.make_key(double, (img + 1,), {}))
+        self.assertNotEqual(key, ImProCache.make_key(double, (img.reshape(4, 3),), {}))
+        self.assertNotEqual(key, ImProCache.make_key(double, (img.astype(np.float32),), {}))
+        self.assertNotEqual(key, ImProCache.make_key(double, (img,), {'factor': 3}))
+        self.assertNotEqual(key, ImProCache.make_key(double, (img,), {'factor': 2.0}))
+
+    def test_normalised_call(self):
+        img = np.arange(12, dtype=np.float64).reshape(3, 4)
+        key = ImProCache.make_key(double, (img,), {})
+        self.assertEqual(key, ImProCache.make_key(double, (img, 2), {}))
+        self.assertEqual(key, ImProCache.make_key(double, (), {'img': img, 'factor': 2}))
+
+    def test_nested_arrays_hashed_by_content(self):
+        big = np.zeros(2000)
+        changed = big.copy()
+        changed[1000] = 1
+        self.assertNotEqual(ImProCache.make_key(double, ([big],), {}),
+                            ImProCache.make_key(double, ([changed],), {}))
+
+    def test_functions_sharing_a_qualname(self):
+        def scaled(factor):
+            def scale(img):
+                return img * factor
+            return scale
+
+        img = np.ones(3)
+        # lambdas differ by code, closures by their cell values
+        self.assertNotEqual(ImProCache.make_key(lambda x: x * 2, (img,), {}),
+                            ImProCache.make_key(lambda x: x * 3, (img,), {}))
+        self.assertNotEqual(ImProCache.make_key(scaled(2), (img,), {}),
+                            ImProCache.make_key(scaled(3), (img,), {}))
+        self.assertEqual(ImProCache.make_key(scaled(2), (img,), {}),
+                         ImProCache.make_key(scaled(2), (img,), {}))
+
+    def test_unhashable_argument(self):
+        with self.assertRaises(TypeError):
+            ImProCache.make_key(double, (np.ones(3), object()), {})
+
+
+class TestMemoCache(unittest.TestCase):
+    def test_hit_is_read_only_and_not_copied(self):
+        cache = ImProCache.MemoCache()
+        memo_double = ImProCache.memoize(double, cache)
+        img = np.ones((4, 4))
+        first = memo_double(img)
+        second = memo_double(img)
+        self.assertIs(first, second)
+        self.assertFalse(second.flags.writeable)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+
+    def test_two_lambdas_on_one_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            img = np.ones(3)
+            cache = ImProCache.MemoCache(cache_dir=cache_dir)
+            self.assertTrue(np.all(ImProCache.memoize(lambda x: x * 2, cache)(img) == 2))
+            self.assertTrue(np.all(ImProCache.memoize(lambda x: x * 3, cache)(img) == 3))
+            cache.clear(disk=True)
+
+    def test_cached_value_isolated_from_input(self):
+        memo_identity = ImProCache.memoize(lambda img: img, ImProCache.MemoCache())
+        img = np.ones((4, 4))
+        res = memo_identity(img)
+        self.assertFalse(res.flags.writeable)
+        self.assertTrue(img.flags.writeable)
+
+        # changing the input does not change the cached result:
+        img[0, 0] = 99
+        self.assertEqual(memo_identity(np.ones((4, 4)))[0, 0], 1)
+
+    def test_lru_byte_budget(self):
+        cache = ImProCache.MemoCache(max_bytes=2 * 8 * 16)
+        memo_double = ImProCache.memoize(double, cache)
+        for i in range(3):
+            memo_double(np.full((4, 4), i, dtype=np.float64))
+        self.assertEqual(len(cache), 2)
+        self.assertLessEqual(cache.nbytes, cache.max_bytes)
+        # the oldest entry was evicted:
+        memo_double(np.full((4, 4), 0, dtype=np.float64))
+        self.assertEqual(cache.misses, 4)
+
+    def test_disk_tier(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            img = np.arange(16, dtype=np.float64).reshape(4, 4)
+            ImProCache.memoize(double, ImProCache.MemoCache(cache_dir=cache_dir))(img)
+            # only the result is left, without temporary files:
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+            self.assertTrue(os.listdir(cache_dir)[0].endswith('.npy'))
+
+            # a fresh cache finds the result on disk:
+            cache = ImProCache.MemoCache(cache_dir=cache_dir)
+            res = ImProCache.memoize(double, cache)(img)
+            self.assertEqual(cache.hits, 1)
+            self.assertFalse(res.flags.writeable)
+            self.assertTrue(np.all(res == img * 2))
+            del res
+
+    def test_disk_hits_outside_byte_budget(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            images = [np.full((4, 4), i, dtype=np.float64) for i in range(2)]
+            ImProCache.memoize(double, ImProCache.MemoCache(cache_dir=cache_dir))(images[0])
+
+            # room for a single result in memory
+            cache = ImProCache.MemoCache(max_bytes=8 * 16, cache_dir=cache_dir)
+            memo_double = ImProCache.memoize(double, cache)
+            memo_double(images[1])
+            memo_double(images[0])
+            self.assertEqual(cache.nbytes, 8 * 16)
+
+            # the in-memory result was not evicted by the disk hit:
+            memo_double(images[1])
+            self.assertEqual(cache.hits, 2)
+            self.assertEqual(cache.misses, 1)
+            cache.clear(disk=True)
+            self.assertEqual(os.listdir(cache_dir), [])
+
+    def test_non_positive_budget(self):
+        with self.assertRaises(ValueError):
+            ImProCache.MemoCache(max_bytes=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
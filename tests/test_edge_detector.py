@@ -0,0 +1,92 @@
+import unittest
+import numpy as np
+import src.ImProUtils.edge_detector as ImProEdges
+
+
+def moving_square_frames(num_frames, shape=(64, 80)):
+    """A static gradient background with a small square moving along the diagonal."""
+    background = np.add.outer(np.arange(shape[0]), np.arange(shape[1])).astype(np.float64)
+    for i in range(num_frames):
+        frame = background.copy()
+        frame[10 + i:20 + i, 10 + i:20 + i] = 255
+        yield frame
+
+
+def step_frame(shape=(24, 32)):
+    """Bright left half and dark right half, so the gradient direction is exactly 180 on the edge."""
+    frame = np.zeros(shape)
+    frame[:, :shape[1] // 2] = 255
+    return frame
+
+
+class TestCanny(unittest.TestCase):
+    def test_constant_image(self):
+        img = np.full((16, 20), 100.0)
+        edges = ImProEdges.canny(img, 20, 60, 3)
+        self.assertEqual(edges.shape, (18, 22))
+
+    def test_bright_to_dark_step(self):
+        img = step_frame()
+        edges = ImProEdges.canny(img, 20, 60, 3)
+        # the edge is found in every row, away from the image border:
+        self.assertTrue(np.all(edges[4:-4, 14:20].any(axis=1)))
+        self.assertFalse(edges[4:-4, 4:12].any())
+        self.assertFalse(edges[4:-4, 22:28].any())
+
+
+class TestStreamingCanny(unittest.TestCase):
+    def test_equals_canny(self):
+        frames = list(moving_square_frames(3)) + [step_frame((64, 80)), np.full((64, 80), 7.0)]
+        for temporal in (False, True):
+            stream = ImProEdges.canny_stream(frames, 20, 60, 5, temporal=temporal, tile_size=8)
+            for frame, edges in zip(frames, stream):
+                self.assertTrue(np.array_equal(edges, ImProEdges.canny(frame, 20, 60, 5)))
+
+    def test_stale_edges_with_change_threshold(self):
+        """Changes up to change_threshold are not detected, so the edges lag behind by up to that much."""
+        threshold = 40
+        frames = [np.zeros((32, 32)) for _ in range(3)]
+        frames[1][8:24, 8:24] = threshold
+        frames[2][8:24, 8:24] = threshold + 1
+
+        detector = ImProEdges.StreamingCanny(20, 60, 3, temporal=True, tile_size=8, change_threshold=threshold)
+        detector.process(frames[0])
+        # a square of height change_threshold has edges, but the (edgeless) first frame's are kept:
+        self.assertTrue(ImProEdges.canny(frames[1], 20, 60, 3).any())
+        self.assertFalse(detector.process(frames[1]).any())
+        # one more step and the tiles are recomputed:
+        self.assertTrue(np.array_equal(detector.process(frames[2]), ImProEdges.canny(frames[2], 20, 60, 3)))
+
+    def test_uint8_frames(self):
+        frames = [frame.astype(np.uint8) for frame in moving_square_frames(2)]
+        stream = ImProEdges.canny_stream(frames, 20, 60, 3, temporal=True, tile_size=8)
+        for frame, edges in zip(frames, stream):
+            self.assertTrue(np.array_equal(edges, ImProEdges.canny(frame, 20, 60, 3)))
+
+    def test_buffers_are_reused(self):
+        detector = ImProEdges.StreamingCanny(20, 60, 3)
+        frames = list(moving_square_frames(2))
+        first = detector.process(frames[0])
+        second = detector.process(frames[1])
+        self.assertIs(first, second)
+
+    def test_temporal_matches_full(self):
+        full = ImProEdges.canny_stream(moving_square_frames(4), 20, 60, 5, tile_size=8)
+        temporal = ImProEdges.canny_stream(moving_square_frames(4), 20, 60, 5, temporal=True, tile_size=8)
+        for full_edges, temporal_edges in zip(full, temporal):
+            self.assertTrue(np.array_equal(full_edges, temporal_edges))
+
+    def test_temporal_static_frame(self):
+        detector = ImProEdges.StreamingCanny(20, 60, 3, temporal=True, tile_size=8)
+        frame = next(moving_square_frames(1))
+        expected = detector.process(frame).copy()
+        self.assertEqual(detector._dirty_regions(frame), [])
+        self.assertTrue(np.array_equal(detector.process(frame), expected))
+
+    def test_illegal_tile_size(self):
+        with self.assertRaises(ValueError):
+            ImProEdges.StreamingCanny(20, 60, 3, tile_size=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -144,10 +144,50 @@ class TestGradient(unittest.TestCase):
 
         self.assertTrue(np.all(my_res == output_mat))
 
+    def test_direction_quantization_180(self):
+        """Tests that exactly 180 degrees (E.g. a bright to dark vertical edge) is quantized"""
+        my_res = ImProFilters.direction_quantization(np.array([[180.0, 179.9, 0.0]]))
+
+        self.assertTrue(np.all(my_res == np.array([[180, 180, 0]])))
 
 
 class TestNonMaxSup(unittest.TestCase):
-    pass
+    def test_vertical_edge(self):
+        """Tests that the gradient of a vertical step edge is thinned to a one pixel wide ridge"""
+        # horizontal gradient, peaking between columns 5 and 6 (closer to 5)
+        grad = np.tile(10 - np.abs(np.arange(12) - 5.3), (12, 1))
+        for angle in (0, 180):
+            my_res = ImProFilters.non_maximum_suppression(grad, np.full(grad.shape, angle))
+
+            self.assertTrue(np.all(np.count_nonzero(my_res, axis=1) == 1))
+            self.assertTrue(np.all(my_res[:, 5] == grad[:, 5]))
+
+        # the same edge, rotated to be horizontal
+        my_res = ImProFilters.non_maximum_suppression(grad.T, np.full(grad.shape, 90))
+        self.assertTrue(np.all(np.count_nonzero(my_res, axis=0) == 1))
+
+    def test_diagonal_edge(self):
+        """Tests that the gradient of a diagonal step edge is thinned to a one pixel wide ridge"""
+        # gradient along the main diagonal, constant along the anti diagonals
+        grad = 12 - np.abs(np.add.outer(np.arange(12), np.arange(12)) - 11.3)
+        my_res = ImProFilters.non_maximum_suppression(grad, np.full(grad.shape, 45))
+
+        # every line along the gradient crosses the ridge exactly once
+        for offset in range(-11, 12):
+            self.assertEqual(np.count_nonzero(np.diagonal(my_res, offset)), 1)
+
+        # the same edge, mirrored to the other diagonal
+        my_res = ImProFilters.non_maximum_suppression(grad[:, ::-1], np.full(grad.shape, 135))
+        for offset in range(-11, 12):
+            self.assertEqual(np.count_nonzero(np.diagonal(my_res[:, ::-1], offset)), 1)
+
+    def test_out(self):
+        grad = np.tile(10 - np.abs(np.arange(6) - 2.3), (4, 1))
+        out = np.full(grad.shape, -1.0)
+        my_res = ImProFilters.non_maximum_suppression(grad, np.zeros(grad.shape), out=out)
+
+        self.assertIs(my_res, out)
+        self.assertTrue(np.all(np.count_nonzero(out, axis=1) == 1))
 
 
 class TestHysterisis(unittest.TestCase):